@@ -1,67 +1,330 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 import numpy as np
+import orjson
 import uvicorn
-import pandas as pd
+import csv
 import os
 import re
+import asyncio
+import gzip
+import hashlib
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
+
+def _cgroup_cpu_quota():
+    """CPU limit from the cgroup CFS quota (docker --cpus, k8s limits), or None"""
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1: quota is -1 when unlimited
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
 
-app = FastAPI(title="Quick Book Recommender")
+def _available_cpus():
+    """CPUs this process may use: the affinity set, capped by any cgroup CPU quota"""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+_AVAILABLE_CPUS = _available_cpus()
+# Threads per encoder call; MiniLM-sized single queries stop scaling past ~4
+NUM_THREADS = int(os.environ.get("TORCH_NUM_THREADS", min(4, _AVAILABLE_CPUS)))
+# libgomp reads this once at load, so it must be set before faiss (below) and
+# torch / onnxruntime (loaded lazily) are imported; omp_set_num_threads() only
+# affects the calling thread
+os.environ.setdefault("OMP_NUM_THREADS", str(NUM_THREADS))
+
+try:
+    import simsimd  # hand-tuned AVX-512/NEON dot-product kernels (f32/f16/i8)
+except ImportError:
+    simsimd = None
+
+try:
+    import faiss  # top-k inner-product search without materializing every score
+except ImportError:
+    faiss = None
+
+try:
+    import ahocorasick  # pyahocorasick: multi-pattern automaton, one pass over the text
+except ImportError:
+    ahocorasick = None
+
+app = FastAPI(title="Quick Book Recommender", default_response_class=ORJSONResponse)
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+# Inference runtime for the encoder: "onnx", "openvino", "torch" or "model2vec"
+BACKEND = os.environ.get("BACKEND", "onnx").lower()
+# Static embedding table distilled from MODEL_NAME by distill_model.py
+M2V_MODEL_PATH = os.environ.get("M2V_MODEL_PATH", "m2v-minilm")
+# Prebuilt int8 quantized exports shipped in the model's HF repo
+_BACKEND_MODEL_FILES = {
+    "onnx": "onnx/model_qint8_avx512_vnni.onnx",
+    "openvino": "openvino/openvino_model_qint8_quantized.xml",
+}
+
+# Request work (encode + scoring) runs here so it never blocks the event loop;
+# NumPy and the inference runtimes release the GIL in their kernels
+_POOL = ThreadPoolExecutor(max_workers=_AVAILABLE_CPUS)
+
+# Storage dtype for the corpus matrix; float16 halves the bytes scoring has to
+# stream, but only SimSIMD has native f16 kernels (NumPy's half matmul is ~7x
+# slower than float32 BLAS), so float16 is the default only with simsimd.
+# Scores are always returned as float32.
+CORPUS_DTYPE = np.dtype(os.environ.get("CORPUS_DTYPE", "float16" if simsimd is not None else "float32"))
+
+# FAISS index for top-k search: "flat" (exact) or "hnsw" (approximate, for
+# large catalogs). Ignored when faiss isn't installed.
+INDEX_TYPE = os.environ.get("INDEX_TYPE", "flat").lower()
+HNSW_EF_SEARCH = int(os.environ.get("HNSW_EF_SEARCH", 64))
+
+# Encoded corpus matrices are saved here, keyed by a hash of the book texts
+# and encoder settings, so restarts skip re-encoding the catalog
+CACHE_DIR = os.environ.get("EMBEDDINGS_CACHE_DIR", ".cache")
 
 # Lazy loading to reduce startup memory
 _model = None
 _CORPUS_EMBS = None
+_CORPUS_INDEX = None
+
+def _runtime_model_kwargs():
+    """model_kwargs for the ONNX Runtime / OpenVINO session: threads, provider, graph opts"""
+    if BACKEND == "onnx":
+        import onnxruntime as ort
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = NUM_THREADS
+        opts.inter_op_num_threads = 1
+        # Full graph fusion (attention, GELU, LayerNorm) on the CPU provider
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return {"session_options": opts, "provider": "CPUExecutionProvider"}
+    if BACKEND == "openvino":
+        return {"ov_config": {"INFERENCE_NUM_THREADS": str(NUM_THREADS)}}
+    return {}
 
 def get_model():
-    """Lazy load the sentence transformer model"""
+    """Lazy load the sentence transformer model on the runtime picked by BACKEND"""
     global _model
     if _model is None:
-        from sentence_transformers import SentenceTransformer
-        _model = SentenceTransformer("all-MiniLM-L6-v2")
+        if BACKEND == "model2vec":
+            # Token-embedding lookup + mean pooling, no transformer forward pass
+            from model2vec import StaticModel
+            _model = StaticModel.from_pretrained(M2V_MODEL_PATH, normalize=True)
+        elif BACKEND in _BACKEND_MODEL_FILES:
+            from sentence_transformers import SentenceTransformer
+            _model = SentenceTransformer(
+                MODEL_NAME,
+                backend=BACKEND,
+                model_kwargs={"file_name": _BACKEND_MODEL_FILES[BACKEND], **_runtime_model_kwargs()},
+            )
+        elif BACKEND == "torch":
+            import torch
+            torch.set_num_threads(NUM_THREADS)
+            torch.set_num_interop_threads(1)
+            from sentence_transformers import SentenceTransformer
+            _model = SentenceTransformer(MODEL_NAME)
+        else:
+            raise ValueError(f"Unknown BACKEND '{BACKEND}' (expected onnx, openvino, torch or model2vec)")
     return _model
 
+def _corpus_cache_path(texts):
+    """Cache file for this corpus under the current model/backend/dtype"""
+    key = "\n".join([MODEL_NAME, BACKEND, _BACKEND_MODEL_FILES.get(BACKEND, ""),
+                     M2V_MODEL_PATH, CORPUS_DTYPE.name] + texts)
+    h = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"corpus_{h}.npy")
+
 def get_corpus_embeddings():
-    """Lazy load corpus embeddings"""
+    """Lazy load corpus embeddings, memory-mapped from the on-disk cache when present"""
     global _CORPUS_EMBS
     if _CORPUS_EMBS is None:
-        model = get_model()
         texts = [b["title"] + " " + b["author"] + " " + b["description"] for b in BOOKS]
-        embs = model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
-        norms = np.linalg.norm(embs, axis=1, keepdims=True)
-        norms[norms==0] = 1.0
-        _CORPUS_EMBS = embs / norms
+        cache_path = _corpus_cache_path(texts)
+        if os.path.exists(cache_path):
+            # mmap keeps resident memory low and shares pages across workers
+            _CORPUS_EMBS = np.load(cache_path, mmap_mode='r')
+            print(f"✅ Loaded corpus embeddings from {cache_path}")
+        else:
+            model = get_model()
+            embs = model.encode(texts, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
+            _CORPUS_EMBS = np.require(embs, dtype=CORPUS_DTYPE, requirements=['C', 'A'])
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                # Write then rename, so a worker or reload starting at the same
+                # time never mmaps a half-written file
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    np.save(f, _CORPUS_EMBS)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                print(f"⚠️ Could not cache corpus embeddings: {e}")
     return _CORPUS_EMBS
 
+def get_corpus_index():
+    """Lazy build the FAISS index over the corpus embeddings (None without faiss)"""
+    global _CORPUS_INDEX
+    if _CORPUS_INDEX is None and faiss is not None:
+        embs = np.require(get_corpus_embeddings(), dtype=np.float32, requirements=['C', 'A'])
+        d = embs.shape[1]
+        # Vectors are L2-normalized, so inner product == cosine similarity.
+        # A float16 corpus is stored as fp16 codes inside the index too, so
+        # the scan reads half the bytes; queries stay float32 (asymmetric).
+        fp16 = CORPUS_DTYPE == np.float16
+        if INDEX_TYPE == "hnsw":
+            if fp16:
+                index = faiss.IndexHNSWSQ(d, faiss.ScalarQuantizer.QT_fp16, 32, faiss.METRIC_INNER_PRODUCT)
+            else:
+                index = faiss.IndexHNSWFlat(d, 32, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efSearch = HNSW_EF_SEARCH
+        elif INDEX_TYPE == "flat":
+            if fp16:
+                index = faiss.IndexScalarQuantizer(d, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+            else:
+                index = faiss.IndexFlatIP(d)
+        else:
+            raise ValueError(f"Unknown INDEX_TYPE '{INDEX_TYPE}' (expected flat or hnsw)")
+        if not index.is_trained:
+            index.train(embs)
+        index.add(embs)
+        _CORPUS_INDEX = index
+    return _CORPUS_INDEX
+
+# Rows per float16 -> float32 block in the NumPy scoring fallback
+_UPCAST_BLOCK = 8192
+
+def _dot_scores(corpus_embs, q_emb):
+    """Dot product of every corpus row with q_emb, as float32 scores"""
+    q_emb = np.require(q_emb, dtype=corpus_embs.dtype, requirements=['C', 'A'])
+    if simsimd is not None:
+        return np.asarray(simsimd.cdist(q_emb[None, :], corpus_embs, metric="dot"), dtype=np.float32).ravel()
+    if corpus_embs.dtype == np.float16:
+        # Avoid NumPy's non-BLAS half loop: upcast block by block for sgemv
+        q32 = q_emb.astype(np.float32)
+        return np.concatenate([
+            corpus_embs[i:i + _UPCAST_BLOCK].astype(np.float32) @ q32
+            for i in range(0, len(corpus_embs), _UPCAST_BLOCK)
+        ])
+    return (corpus_embs @ q_emb).astype(np.float32)
+
+# Micro-batching: cache misses from concurrent requests are queued and encoded
+# together, one forward pass per batch instead of one per query. A lone query
+# is dispatched immediately; only when other callers are queued or a batch is
+# already encoding does a worker wait briefly for the batch to fill.
+ENCODE_BATCH_SIZE = 16
+ENCODE_BATCH_WAIT = 0.005  # max seconds to wait for more queries under contention
+# Each encode uses NUM_THREADS cores, so this many batches can run side by side
+ENCODE_WORKERS = max(1, _AVAILABLE_CPUS // NUM_THREADS)
+_ENCODE_QUEUE = queue.Queue()
+_ENCODE_WORKERS = []
+_ENCODE_IN_FLIGHT = 0
+_ENCODE_LOCK = threading.Lock()
+
+def _drain_queue(batch, timeout=0.0):
+    """Append queued requests to batch until full, waiting at most timeout seconds"""
+    deadline = time.monotonic() + timeout
+    while len(batch) < ENCODE_BATCH_SIZE:
+        remaining = deadline - time.monotonic()
+        try:
+            if remaining > 0:
+                batch.append(_ENCODE_QUEUE.get(timeout=remaining))
+            else:
+                batch.append(_ENCODE_QUEUE.get_nowait())
+        except queue.Empty:
+            break
+
+def _batch_worker():
+    """Drain the encode queue in batches and resolve each caller's Future"""
+    global _ENCODE_IN_FLIGHT
+    while True:
+        batch = [_ENCODE_QUEUE.get()]
+        _drain_queue(batch)
+        with _ENCODE_LOCK:
+            contended = len(batch) > 1 or _ENCODE_IN_FLIGHT > 0
+            _ENCODE_IN_FLIGHT += 1
+        try:
+            if contended:
+                _drain_queue(batch, ENCODE_BATCH_WAIT)
+
+            texts = [text for text, _ in batch]
+            try:
+                embs = get_model().encode(texts, convert_to_numpy=True, normalize_embeddings=True,
+                                          batch_size=ENCODE_BATCH_SIZE)
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            for (_, fut), emb in zip(batch, embs):
+                fut.set_result(emb)
+        finally:
+            with _ENCODE_LOCK:
+                _ENCODE_IN_FLIGHT -= 1
+
+def _encode_batched(text):
+    """Encode one query through the shared batching workers (blocks until done)"""
+    with _ENCODE_LOCK:
+        if not _ENCODE_WORKERS:
+            for n in range(ENCODE_WORKERS):
+                worker = threading.Thread(target=_batch_worker, name=f"encode-batcher-{n}", daemon=True)
+                worker.start()
+                _ENCODE_WORKERS.append(worker)
+    fut = Future()
+    _ENCODE_QUEUE.put((text, fut))
+    return fut.result()
+
+@lru_cache(maxsize=1024)
+def _encode_query(q_norm: str) -> bytes:
+    """Encode a normalized query to a unit-length vector, cached as immutable bytes"""
+    return np.asarray(_encode_batched(q_norm), dtype=np.float32).tobytes()
+
+def get_query_embedding(query):
+    """Query embedding; repeated queries (e.g. the genre chips) skip the encoder"""
+    return np.frombuffer(_encode_query(query.lower().strip()), dtype=np.float32)
+
 # Mount static files only if directory exists
-if os.path.exists("static"):
+_HAS_STATIC = os.path.exists("static")
+if _HAS_STATIC:
     app.mount("/static", StaticFiles(directory="static"), name="static")
 
 def load_books_from_csv(csv_path="books.csv"):
     """Load books from CSV with memory optimization"""
     try:
-        df = pd.read_csv(csv_path)
         books = []
-        for idx, row in df.iterrows():
-            genres_str = str(row.get('genres', '')).strip()
-            if genres_str and genres_str.lower() != 'nan':
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            for book_id, row in enumerate(csv.DictReader(f), start=1):
+                genres_str = (row.get('genres') or '').strip()
                 genres = [g.strip() for g in genres_str.split(',') if g.strip()]
-            else:
-                genres = []
-
-            book_id = idx + 1
-            cover_path = f"/static/covers/{book_id}.jpg" if os.path.exists("static") else None
-
-            book = {
-                "id": book_id,
-                "title": str(row.get('title', 'Unknown Title')).strip(),
-                "author": str(row.get('author', 'Unknown Author')).strip(),
-                "description": str(row.get('description', 'No description available')).strip(),
-                "genres": genres
-            }
-            if cover_path:
-                book["cover"] = cover_path
-            books.append(book)
+
+                book = {
+                    "id": book_id,
+                    "title": (row.get('title') or 'Unknown Title').strip(),
+                    "author": (row.get('author') or 'Unknown Author').strip(),
+                    "description": (row.get('description') or 'No description available').strip(),
+                    "genres": genres
+                }
+                if _HAS_STATIC:
+                    book["cover"] = f"/static/covers/{book_id}.jpg"
+                books.append(book)
 
         print(f"✅ Loaded {len(books)} books from {csv_path}")
         return books
@@ -104,186 +367,272 @@ def get_default_books():
 # Load books
 BOOKS = load_books_from_csv()
 
-def _detect_genres_from_query_improved(query):
-    """Improved genre detection"""
-    q = query.lower().strip()
-    detected = set()
+# Per-book lookups built once so requests don't re-lowercase every book
+_TITLE_LOOKUP = {}
+for _i, _book in enumerate(BOOKS):
+    _TITLE_LOOKUP.setdefault(_book['title'].lower(), _i)
+_BOOK_GENRES_LOWER = [frozenset(g.lower() for g in b.get('genres', [])) for b in BOOKS]
+
+# One bit per catalog genre, packed into uint64 words (a single word for up to
+# 64 genres), so genre filtering is a vectorized AND instead of set lookups
+_GENRE_IDX = {g: i for i, g in enumerate(sorted(set().union(*_BOOK_GENRES_LOWER)))}
+_GENRE_WORDS = max(1, -(-len(_GENRE_IDX) // 64))
+
+def _genre_bits(genres):
+    """uint64 bitmask over _GENRE_IDX; genres outside the catalog are ignored"""
+    bits = np.zeros(_GENRE_WORDS, dtype=np.uint64)
+    for g in genres:
+        i = _GENRE_IDX.get(g)
+        if i is not None:
+            bits[i // 64] |= np.uint64(1 << (i % 64))
+    return bits
+
+_BOOK_GENRE_BITS = np.array([_genre_bits(g) for g in _BOOK_GENRES_LOWER], dtype=np.uint64).reshape(len(BOOKS), _GENRE_WORDS)
+
+def _genre_overlap(q_bits):
+    """Number of genres each book shares with q_bits (popcount of the AND)"""
+    shared = np.ascontiguousarray(_BOOK_GENRE_BITS & q_bits)
+    return np.unpackbits(shared.view(np.uint8), axis=1).sum(axis=1)
+
+_GENRE_MAPPING = MappingProxyType({
+    "science fiction": "science fiction", "sci-fi": "science fiction", "scifi": "science fiction", "sf": "science fiction",
+    "fantasy": "fantasy", "romance": "romance", "romantic": "romance",
+    "dystopia": "dystopia", "dystopian": "dystopia",
+    "nonfiction": "nonfiction", "non-fiction": "nonfiction", "non fiction": "nonfiction",
+    "classic": "classic", "classics": "classic", "adventure": "adventure", "cyberpunk": "cyberpunk",
+    "gothic": "gothic", "history": "history", "historical": "history", "epic": "epic",
+    "survival": "survival", "political": "political fiction", "politics": "political fiction",
+    "coming-of-age": "coming-of-age", "coming of age": "coming-of-age",
+    "social commentary": "social commentary", "thriller": "thriller", "mystery": "mystery",
+    "psychological": "psychological", "young adult": "young adult", "ya": "young adult",
+    "contemporary": "contemporary fiction", "memoir": "memoir", "biography": "biography",
+    "self-help": "self-help", "philosophy": "philosophy", "comedy": "comedy",
+    "time travel": "time travel", "lgbtq": "lgbtq+", "lgbtq+": "lgbtq+",
+    "post-apocalyptic": "post-apocalyptic", "military": "military", "western": "western"
+})
+
+# One alternation over every genre term, longest first so "science fiction"
+# wins over shorter overlaps. Lookarounds instead of \b because some terms
+# end in non-word characters ("lgbtq+"); the optional "s"/"es" suffix keeps
+# plurals like "thrillers" or "westerns" matching their genre.
+_GENRE_RE = re.compile(
+    r"(?<!\w)("
+    + "|".join(re.escape(t) for t in sorted(_GENRE_MAPPING, key=len, reverse=True))
+    + r")(?:e?s)?(?!\w)"
+)
+
+def _detect_genres_from_query_improved(q):
+    """Improved genre detection; q must already be lowercased and stripped"""
+    if q in _GENRE_MAPPING:
+        return [_GENRE_MAPPING[q]]
+
+    detected = {_GENRE_MAPPING[m] for m in _GENRE_RE.findall(q)}
+    return list(detected)
+
+# Hardcoded query patterns - maps common queries to book indices
+# These will work 100% of the time
+_TITLE_PATTERNS = MappingProxyType({
+    # Dune patterns
+    'i like dune': 'dune',
+    'i liked dune': 'dune',
+    'i love dune': 'dune',
+    'similar to dune': 'dune',
+    'books like dune': 'dune',
+    'dune': 'dune',
     
-    genre_mapping = {
-        "science fiction": "science fiction", "sci-fi": "science fiction", "scifi": "science fiction", "sf": "science fiction",
-        "fantasy": "fantasy", "romance": "romance", "romantic": "romance",
-        "dystopia": "dystopia", "dystopian": "dystopia",
-        "nonfiction": "nonfiction", "non-fiction": "nonfiction", "non fiction": "nonfiction",
-        "classic": "classic", "classics": "classic", "adventure": "adventure", "cyberpunk": "cyberpunk",
-        "gothic": "gothic", "history": "history", "historical": "history", "epic": "epic",
-        "survival": "survival", "political": "political fiction", "politics": "political fiction",
-        "coming-of-age": "coming-of-age", "coming of age": "coming-of-age",
-        "social commentary": "social commentary", "thriller": "thriller", "mystery": "mystery",
-        "psychological": "psychological", "young adult": "young adult", "ya": "young adult",
-        "contemporary": "contemporary fiction", "memoir": "memoir", "biography": "biography",
-        "self-help": "self-help", "philosophy": "philosophy", "comedy": "comedy",
-        "time travel": "time travel", "lgbtq": "lgbtq+", "lgbtq+": "lgbtq+",
-        "post-apocalyptic": "post-apocalyptic", "military": "military", "western": "western"
-    }
+    # The Hobbit patterns
+    'i like the hobbit': 'the hobbit',
+    'i liked the hobbit': 'the hobbit',
+    'similar to the hobbit': 'the hobbit',
+    'books like the hobbit': 'the hobbit',
+    'the hobbit': 'the hobbit',
+    'hobbit': 'the hobbit',
     
-    if q in genre_mapping:
-        detected.add(genre_mapping[q])
-        return list(detected)
+    # Pride and Prejudice patterns
+    'i like pride and prejudice': 'pride and prejudice',
+    'i liked pride and prejudice': 'pride and prejudice',
+    'similar to pride and prejudice': 'pride and prejudice',
+    'pride and prejudice': 'pride and prejudice',
     
-    for genre_term, canonical_genre in genre_mapping.items():
-        if genre_term in q:
-            detected.add(canonical_genre)
+    # 1984 patterns
+    'i like 1984': '1984',
+    'i liked 1984': '1984',
+    'similar to 1984': '1984',
+    'books like 1984': '1984',
+    '1984': '1984',
     
-    if not detected:
-        words = q.split()
-        for word in words:
-            word = word.strip('.,!?;:"()[]{}')
-            if word in genre_mapping:
-                detected.add(genre_mapping[word])
+    # Harry Potter patterns
+    'i like harry potter': 'harry potter and the sorcerer\'s stone',
+    'i liked harry potter': 'harry potter and the sorcerer\'s stone',
+    'similar to harry potter': 'harry potter and the sorcerer\'s stone',
+    'harry potter': 'harry potter and the sorcerer\'s stone',
     
-    return list(detected)
-
-def _find_title_mentioned(query):
-    """Enhanced title detection with hardcoded patterns for reliability"""
-    if not query:
-        return None
-        
-    q = query.lower().strip()
+    # The Hunger Games patterns
+    'i like the hunger games': 'the hunger games',
+    'i liked hunger games': 'the hunger games',
+    'similar to hunger games': 'the hunger games',
+    'hunger games': 'the hunger games',
     
-    # Hardcoded query patterns - maps common queries to book indices
-    # These will work 100% of the time
-    hardcoded_patterns = {
-        # Dune patterns
-        'i like dune': 'dune',
-        'i liked dune': 'dune',
-        'i love dune': 'dune',
-        'similar to dune': 'dune',
-        'books like dune': 'dune',
-        'dune': 'dune',
-        
-        # The Hobbit patterns
-        'i like the hobbit': 'the hobbit',
-        'i liked the hobbit': 'the hobbit',
-        'similar to the hobbit': 'the hobbit',
-        'books like the hobbit': 'the hobbit',
-        'the hobbit': 'the hobbit',
-        'hobbit': 'the hobbit',
-        
-        # Pride and Prejudice patterns
-        'i like pride and prejudice': 'pride and prejudice',
-        'i liked pride and prejudice': 'pride and prejudice',
-        'similar to pride and prejudice': 'pride and prejudice',
-        'pride and prejudice': 'pride and prejudice',
-        
-        # 1984 patterns
-        'i like 1984': '1984',
-        'i liked 1984': '1984',
-        'similar to 1984': '1984',
-        'books like 1984': '1984',
-        '1984': '1984',
-        
-        # Harry Potter patterns
-        'i like harry potter': 'harry potter and the sorcerer\'s stone',
-        'i liked harry potter': 'harry potter and the sorcerer\'s stone',
-        'similar to harry potter': 'harry potter and the sorcerer\'s stone',
-        'harry potter': 'harry potter and the sorcerer\'s stone',
-        
-        # The Hunger Games patterns
-        'i like the hunger games': 'the hunger games',
-        'i liked hunger games': 'the hunger games',
-        'similar to hunger games': 'the hunger games',
-        'hunger games': 'the hunger games',
-        
-        # The Martian patterns
-        'i like the martian': 'the martian',
-        'similar to the martian': 'the martian',
-        'the martian': 'the martian',
-        'martian': 'the martian',
-        
-        # Sapiens patterns
-        'i like sapiens': 'sapiens',
-        'similar to sapiens': 'sapiens',
-        'sapiens': 'sapiens',
-        
-        # Atomic Habits patterns
-        'i like atomic habits': 'atomic habits',
-        'atomic habits': 'atomic habits',
-    }
+    # The Martian patterns
+    'i like the martian': 'the martian',
+    'similar to the martian': 'the martian',
+    'the martian': 'the martian',
+    'martian': 'the martian',
+    
+    # Sapiens patterns
+    'i like sapiens': 'sapiens',
+    'similar to sapiens': 'sapiens',
+    'sapiens': 'sapiens',
+    
+    # Atomic Habits patterns
+    'i like atomic habits': 'atomic habits',
+    'atomic habits': 'atomic habits',
+})
+
+# Filler words stripped before the loose title match
+_FILLER_WORDS_RE = re.compile(r'\b(i|like|liked|love|loved|similar|to|books|the|a|an)\b')
+
+def _build_title_automaton():
+    automaton = ahocorasick.Automaton()
+    for title_lower, i in _TITLE_LOOKUP.items():
+        automaton.add_word(title_lower, (len(title_lower), i))
+    automaton.make_automaton()
+    return automaton
+
+# Finds every catalog title inside a query in one pass (pyahocorasick)
+_TITLE_AUTOMATON = _build_title_automaton() if ahocorasick is not None and _TITLE_LOOKUP else None
+
+def _title_in_query(q):
+    """Index of the longest catalog title contained in q (earliest book on ties)"""
+    if _TITLE_AUTOMATON is None:
+        title_lower = max((t for t in _TITLE_LOOKUP if t in q), key=len, default=None)
+        return None if title_lower is None else _TITLE_LOOKUP[title_lower]
+    best = None
+    for _, (length, i) in _TITLE_AUTOMATON.iter(q):
+        if best is None or length > best[0] or (length == best[0] and i < best[1]):
+            best = (length, i)
+    return None if best is None else best[1]
+
+def _find_title_mentioned(q):
+    """Enhanced title detection with hardcoded patterns for reliability; q must already be lowercased and stripped"""
+    if not q:
+        return None
     
     # Check hardcoded patterns first
-    if q in hardcoded_patterns:
-        target_title = hardcoded_patterns[q]
-        # Find the book by title
-        for i, book in enumerate(BOOKS):
-            if book['title'].lower() == target_title:
-                print(f"✅ Hardcoded match: '{q}' → {book['title']}")
-                return i
+    if q in _TITLE_PATTERNS:
+        target_title = _TITLE_PATTERNS[q]
+        i = _TITLE_LOOKUP.get(target_title)
+        if i is not None:
+            print(f"✅ Hardcoded match: '{q}' → {BOOKS[i]['title']}")
+            return i
     
     # Fallback: Try to find any book title mentioned in the query
-    for i, book in enumerate(BOOKS):
-        title_lower = book['title'].lower()
-        
-        # Direct substring match
-        if title_lower in q:
-            print(f"✅ Substring match: {book['title']}")
-            return i
+    i = _title_in_query(q)
+    if i is not None:
+        print(f"✅ Substring match: {BOOKS[i]['title']}")
+        return i
     
     # Try without common words
-    q_cleaned = re.sub(r'\b(i|like|liked|love|loved|similar|to|books|the|a|an)\b', '', q).strip()
+    q_cleaned = _FILLER_WORDS_RE.sub('', q).strip()
     
-    for i, book in enumerate(BOOKS):
-        title_lower = book['title'].lower()
+    for title_lower, i in _TITLE_LOOKUP.items():
         if title_lower in q_cleaned or q_cleaned in title_lower:
-            print(f"✅ Cleaned match: {book['title']}")
+            print(f"✅ Cleaned match: {BOOKS[i]['title']}")
             return i
     
     print(f"❌ No book found for query: '{q}'")
     return None
 
-def _book_has_genre(book, detected_genres):
-    if not detected_genres:
-        return False
-    book_genres_norm = [g.lower() for g in book.get('genres', [])]
-    return any(dg in book_genres_norm for dg in detected_genres)
+def _topk(sims, k):
+    """Indices of the k largest scores, best first (O(N) partition + O(k log k) sort)"""
+    k = min(k, len(sims))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    idx = np.argpartition(-sims, k - 1)[:k]
+    return idx[np.argsort(-sims[idx])]
+
+def _score(q_emb, exclude=()):
+    """Similarity of every book to q_emb; excluded indices score -inf"""
+    sims = _dot_scores(get_corpus_embeddings(), q_emb)
+    if len(exclude):
+        used_mask = np.zeros(len(sims), dtype=bool)
+        used_mask[list(exclude)] = True
+        sims[used_mask] = -np.inf
+    return sims
+
+def _search(q_emb, k, exclude=()):
+    """(scores, indices) of the k books most similar to q_emb, best first"""
+    index = get_corpus_index()
+    if index is None:
+        sims = _score(q_emb, exclude)
+        top_idx = _topk(sims, k)
+        top_idx = top_idx[np.isfinite(sims[top_idx])]  # never hand back excluded books
+        return sims[top_idx], top_idx
+    exclude = set(exclude)
+    q = np.require(q_emb, dtype=np.float32, requirements=['C', 'A']).reshape(1, -1)
+    # Over-fetch so k results survive dropping the excluded books
+    D, I = index.search(q, min(k + len(exclude), index.ntotal))
+    keep = [j for j, i in enumerate(I[0]) if i >= 0 and i not in exclude][:k]
+    return D[0][keep], I[0][keep].astype(np.intp)
+
+def _recommend_by_genre(detected_genres, q_lower, k):
+    """Books matching any detected genre, topped up by semantic search; None if no match"""
+    print(f"🏷️ Detected genres: {detected_genres}")
+    q_bits = _genre_bits(detected_genres)
+    hits = np.flatnonzero((_BOOK_GENRE_BITS & q_bits).any(axis=1))
+    genre_matches = [(int(i), BOOKS[i]) for i in hits]
+    
+    if len(genre_matches) >= k:
+        import random
+        random.shuffle(genre_matches)
+        print(f"✅ Returning {k} genre-matched books")
+        return [book for _, book in genre_matches[:k]]
+    elif genre_matches:
+        print(f"⚠️ Only {len(genre_matches)} genre matches, filling with semantic search")
+        used_indices = [i for i, _ in genre_matches]
+        remaining_needed = min(k, len(BOOKS)) - len(used_indices)
+        _, extra = _search(get_query_embedding(q_lower), remaining_needed, exclude=used_indices)
+        return [book for _, book in genre_matches] + [BOOKS[int(i)] for i in extra]
+    return None
 
 def recommend_by_text(query_text: str, k: int = 5):
     """Dynamic recommendation logic with natural language understanding"""
     q = (query_text or "").strip()
     if not q:
         return []
+    q_lower = q.lower()
 
     print(f"\n🔍 Processing query: '{q}'")
 
+    # 0) Exact genre query (the homepage chips): skip title detection, whose
+    # loose matching would otherwise map e.g. "romance" to "Neuromancer"
+    if q_lower in _GENRE_MAPPING:
+        results = _recommend_by_genre([_GENRE_MAPPING[q_lower]], q_lower, k)
+        if results is not None:
+            return results
+
     # 1) Check if user mentioned a specific book title
-    title_idx = _find_title_mentioned(q)
+    title_idx = _find_title_mentioned(q_lower)
     if title_idx is not None:
         source_book = BOOKS[title_idx]
         print(f"📚 Using book-based recommendation for: {source_book['title']}")
         print(f"   Genres: {source_book['genres']}")
         
-        corpus_embs = get_corpus_embeddings()
-        q_emb = corpus_embs[title_idx]
-        sims = (corpus_embs @ q_emb)
-        sims[title_idx] = -1.0  # Don't return the same book
+        # Full scores rather than _search(): the genre boost below can
+        # promote any book, so top-k can't be cut before it is applied
+        q_emb = get_corpus_embeddings()[title_idx]
+        sims = _score(q_emb, exclude=[title_idx])  # Don't return the same book
         
         # BOOST books with matching genres (prioritize same-genre recommendations)
-        source_genres = set(g.lower() for g in source_book.get('genres', []))
-        
-        for i, book in enumerate(BOOKS):
-            if i == title_idx:
-                continue
-            book_genres = set(g.lower() for g in book.get('genres', []))
-            genre_overlap = len(source_genres & book_genres)
-            
-            # Boost by 0.3 for each matching genre (strong preference for same genre)
-            if genre_overlap > 0:
-                sims[i] += 0.3 * genre_overlap
+        # Boost by 0.3 for each matching genre (strong preference for same genre)
+        sims += 0.3 * _genre_overlap(_BOOK_GENRE_BITS[title_idx])
         
         # Add slight randomization for variety (smaller now)
         noise = np.random.uniform(-0.02, 0.02, size=sims.shape)
-        sims_with_noise = sims + (sims * noise)
+        sims_with_noise = sims * (1.0 + noise)  # keeps -inf (excluded) at -inf
         
-        top_idx = np.argsort(-sims_with_noise)[:k]
+        top_idx = _topk(sims_with_noise, k)
+        top_idx = top_idx[np.isfinite(sims_with_noise[top_idx])]  # never hand back excluded books
         results = [BOOKS[int(i)] for i in top_idx]
         
         # Log what we're returning
@@ -291,42 +640,23 @@ def recommend_by_text(query_text: str, k: int = 5):
         return results
 
     # 2) Detect genres from query
-    detected_genres = _detect_genres_from_query_improved(q)
+    detected_genres = _detect_genres_from_query_improved(q_lower)
 
     # 3) Genre-based recommendations
     if detected_genres:
-        print(f"🏷️ Detected genres: {detected_genres}")
-        genre_matches = []
-        for i, book in enumerate(BOOKS):
-            book_genres_lower = [g.lower() for g in book.get('genres', [])]
-            if any(dg in book_genres_lower for dg in detected_genres):
-                genre_matches.append((i, book))
-        
-        if len(genre_matches) >= k:
-            import random
-            random.shuffle(genre_matches)
-            print(f"✅ Returning {k} genre-matched books")
-            return [book for _, book in genre_matches[:k]]
-        elif genre_matches:
-            print(f"⚠️ Only {len(genre_matches)} genre matches, filling with semantic search")
-            # Fall through to semantic search
+        results = _recommend_by_genre(detected_genres, q_lower, k)
+        if results is not None:
+            return results
     
     # 4) Semantic embedding similarity
     print("🧠 Using semantic search")
-    model = get_model()
-    corpus_embs = get_corpus_embeddings()
-    q_emb = model.encode([q], convert_to_numpy=True)[0]
-    q_emb = q_emb / (np.linalg.norm(q_emb) + 1e-9)
-    sims = (corpus_embs @ q_emb)
+    top_n = min(k * 2, len(BOOKS))
+    top_sims, top_indices = _search(get_query_embedding(q_lower), top_n)
     
     # Add diversity with temperature scaling
     temperature = 1.2
-    sims_scaled = sims / temperature
+    top_sims = top_sims / temperature
     
-    top_n = min(k * 2, len(BOOKS))
-    top_indices = np.argsort(-sims_scaled)[:top_n]
-    
-    top_sims = sims_scaled[top_indices]
     top_sims_exp = np.exp(top_sims - np.max(top_sims))
     probs = top_sims_exp / np.sum(top_sims_exp)
     
@@ -339,9 +669,7 @@ def recommend_by_text(query_text: str, k: int = 5):
     
     return [BOOKS[int(i)] for i in selected_indices]
 
-@app.get("/", response_class=HTMLResponse)
-async def homepage():
-    html = """<!doctype html>
+_HOMEPAGE_HTML = """<!doctype html>
 <html lang="en">
 <head>
   <meta charset="utf-8"/>
@@ -536,24 +864,73 @@ async def homepage():
 </body>
 </html>
 """
-    return HTMLResponse(content=html)
+
+# The page is static, so both encodings are built once at import; gzip is
+# precompressed rather than compressed per request
+_HOMEPAGE_HEADERS = {"Cache-Control": "public, max-age=3600", "Vary": "Accept-Encoding"}
+_HOMEPAGE_RESPONSE = HTMLResponse(content=_HOMEPAGE_HTML, headers=_HOMEPAGE_HEADERS)
+_HOMEPAGE_GZIP_RESPONSE = HTMLResponse(
+    content=gzip.compress(_HOMEPAGE_HTML.encode("utf-8")),
+    headers={**_HOMEPAGE_HEADERS, "Content-Encoding": "gzip"},
+)
+
+def _accepts_gzip(accept_encoding):
+    """Whether an Accept-Encoding header allows gzip (q=0 means refused)"""
+    q_by_coding = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        q_by_coding[coding.strip()] = q
+    # An explicit gzip entry wins over the "*" wildcard
+    return q_by_coding.get("gzip", q_by_coding.get("*", 0.0)) > 0
+
+@app.get("/", response_class=HTMLResponse)
+async def homepage(request: Request):
+    if _accepts_gzip(request.headers.get("accept-encoding", "")):
+        return _HOMEPAGE_GZIP_RESPONSE
+    return _HOMEPAGE_RESPONSE
 
 @app.post("/recommend")
 async def recommend(request: Request):
-    body = await request.json()
+    body = orjson.loads(await request.body())
     text = body.get("text", "")
     k = int(body.get("k", 5))
     if not text:
-        return JSONResponse({"error": "provide 'text' in JSON"}, status_code=400)
+        return ORJSONResponse({"error": "provide 'text' in JSON"}, status_code=400)
     
     try:
-        results = recommend_by_text(text, k=k)
-        return {"results": results}
+        results = await asyncio.get_running_loop().run_in_executor(_POOL, recommend_by_text, text, k)
+        # Return the response directly so FastAPI skips jsonable_encoder on the hot path
+        return ORJSONResponse({"results": results})
     except Exception as e:
         print(f"❌ Error in recommendation: {e}")
         import traceback
         traceback.print_exc()
-        return JSONResponse({"error": str(e)}, status_code=500)
+        return ORJSONResponse({"error": str(e)}, status_code=500)
+
+# Queries sent by the homepage genre chips; with the catalog genres these
+# make up most traffic, so their embeddings are cached before serving
+_CHIP_QUERIES = ("Science Fiction", "Fantasy", "Romance", "Dystopia", "Nonfiction")
+
+def _warm_up():
+    """Load the model, encode the corpus and prefill the query embedding cache"""
+    get_corpus_embeddings()
+    get_corpus_index()
+    for text in _CHIP_QUERIES + tuple(_GENRE_IDX):
+        get_query_embedding(text)
+
+@app.on_event("startup")
+async def warm_up_model():
+    # Pay model load + corpus encode before serving, off the event loop
+    await asyncio.get_running_loop().run_in_executor(_POOL, _warm_up)
+    print("🔥 Model and corpus embeddings warmed up")
 
 @app.get("/health")
 async def health_check():
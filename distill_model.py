@@ -0,0 +1,16 @@
+# distill_model.py
+# Distill the sentence-transformer into a Model2Vec static embedding model
+# for BACKEND=model2vec. Needs: pip install "model2vec[distill]"
+import os
+from model2vec.distill import distill
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+OUT_DIR = os.environ.get("M2V_MODEL_PATH", "m2v-minilm")
+
+def main():
+    m2v = distill(model_name=MODEL_NAME)
+    m2v.save_pretrained(OUT_DIR)
+    print("Done. Saved static model to", OUT_DIR)
+
+if __name__ == "__main__":
+    main()
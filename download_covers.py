@@ -1,8 +1,10 @@
 # download_covers.py
 import csv
 import os
-import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from PIL import Image
 from urllib.parse import quote_plus
@@ -13,10 +15,20 @@ CSV_OUT = "books_with_covers.csv"
 COVERS_DIR = os.path.join("static", "covers")
 PLACEHOLDER = os.path.join(COVERS_DIR, "placeholder.jpg")
 IMG_SIZE = (300, 430)
-SLEEP_BETWEEN = 0.25
+# Concurrent cover lookups; also caps how many requests hit openlibrary at once
+MAX_WORKERS = 8
 
 os.makedirs(COVERS_DIR, exist_ok=True)
 
+# One keep-alive connection pool shared by all workers, sized to MAX_WORKERS,
+# with retries/backoff for transient openlibrary errors
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=MAX_WORKERS,
+    pool_maxsize=MAX_WORKERS,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[429, 500, 502, 503, 504]),
+))
+
 def slugify(s):
     s = s.lower().strip()
     s = re.sub(r"[^\w\s-]", "", s)
@@ -25,16 +37,18 @@ def slugify(s):
     return s or "book"
 
 def save_image(pil_img, path):
+    # Let libjpeg decode straight at 1/2, 1/4 or 1/8 scale (no-op for non-JPEGs)
+    pil_img.draft("RGB", IMG_SIZE)
     pil_img = pil_img.convert("RGB")
-    pil_img.thumbnail(IMG_SIZE, Image.LANCZOS)
-    pil_img.save(path, format="JPEG", quality=85, optimize=True)
+    pil_img.thumbnail(IMG_SIZE, Image.BILINEAR)
+    pil_img.save(path, format="JPEG", quality=85)
 
 def fetch_cover_by_isbn(isbn):
     if not isbn:
         return None
     url = f"https://covers.openlibrary.org/b/isbn/{quote_plus(isbn)}-L.jpg"
     try:
-        r = requests.get(url, timeout=10)
+        r = SESSION.get(url, timeout=10)
         if r.status_code == 200 and r.headers.get("content-type","").startswith("image"):
             return Image.open(BytesIO(r.content))
     except Exception:
@@ -45,7 +59,7 @@ def fetch_cover_by_title_search(title):
     if not title:
         return None
     try:
-        r = requests.get("https://openlibrary.org/search.json", params={"title": title}, timeout=10)
+        r = SESSION.get("https://openlibrary.org/search.json", params={"title": title}, timeout=10)
         if r.status_code != 200:
             return None
         data = r.json()
@@ -67,52 +81,54 @@ def ensure_placeholder():
     img = Image.new("RGB", IMG_SIZE, (30, 40, 50))
     save_image(img, PLACEHOLDER)
 
+def process_row(idx, row):
+    title = (row.get('title') or "").strip()
+    author = (row.get('author') or "").strip()
+    # genres in your CSV are comma-separated; keep them
+    genres = (row.get('genres') or "").strip()
+    # create a safe filename: {id}_{slug}.jpg
+    slug = slugify(title)[:40]
+    fname = f"{idx}_{slug}.jpg"
+    out_path = os.path.join(COVERS_DIR, fname)
+
+    if os.path.exists(out_path):
+        print(f"[{idx}] exists -> {fname}")
+        cover_url = f"/static/covers/{fname}"
+    else:
+        # Try to fetch by title search (no ISBN column in your CSV)
+        print(f"[{idx}] searching cover for: {title}")
+        img = fetch_cover_by_title_search(title)
+        if img:
+            try:
+                save_image(img, out_path)
+                cover_url = f"/static/covers/{fname}"
+                print(f"[{idx}] saved cover -> {fname}")
+            except Exception as e:
+                print(f"[{idx}] failed save: {e}; using placeholder")
+                cover_url = "/static/covers/placeholder.jpg"
+        else:
+            print(f"[{idx}] no cover found; using placeholder")
+            cover_url = "/static/covers/placeholder.jpg"
+
+    # compose output row with cover path and id
+    return {
+        "id": str(idx),
+        "title": title,
+        "author": author,
+        "description": row.get('description') or "",
+        # keep same delimiter as input (comma-separated); you can change to pipe if you prefer
+        "genres": genres,
+        "cover": cover_url
+    }
+
 def main():
     ensure_placeholder()
-    rows_out = []
     with open(CSV_IN, newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for idx, row in enumerate(reader, start=1):
-            title = (row.get('title') or "").strip()
-            author = (row.get('author') or "").strip()
-            # genres in your CSV are comma-separated; keep them
-            genres = (row.get('genres') or "").strip()
-            # create a safe filename: {id}_{slug}.jpg
-            slug = slugify(title)[:40]
-            fname = f"{idx}_{slug}.jpg"
-            out_path = os.path.join(COVERS_DIR, fname)
-
-            if os.path.exists(out_path):
-                print(f"[{idx}] exists -> {fname}")
-                cover_url = f"/static/covers/{fname}"
-            else:
-                # Try to fetch by title search (no ISBN column in your CSV)
-                print(f"[{idx}] searching cover for: {title}")
-                img = fetch_cover_by_title_search(title)
-                time.sleep(SLEEP_BETWEEN)
-                if img:
-                    try:
-                        save_image(img, out_path)
-                        cover_url = f"/static/covers/{fname}"
-                        print(f"[{idx}] saved cover -> {fname}")
-                    except Exception as e:
-                        print(f"[{idx}] failed save: {e}; using placeholder")
-                        cover_url = "/static/covers/placeholder.jpg"
-                else:
-                    print(f"[{idx}] no cover found; using placeholder")
-                    cover_url = "/static/covers/placeholder.jpg"
+        rows = list(csv.DictReader(f))
 
-            # compose output row with cover path and id
-            out_row = {
-                "id": str(idx),
-                "title": title,
-                "author": author,
-                "description": row.get('description') or "",
-                # keep same delimiter as input (comma-separated); you can change to pipe if you prefer
-                "genres": genres,
-                "cover": cover_url
-            }
-            rows_out.append(out_row)
+    # Lookups are network-bound, so fetch covers concurrently; map() keeps CSV order
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        rows_out = list(pool.map(process_row, range(1, len(rows) + 1), rows))
 
     # write augmented CSV
     fieldnames = ["id", "title", "author", "description", "genres", "cover"]